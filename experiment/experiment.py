@@ -4,31 +4,73 @@ pos Energy Blueprint Stress Experiment
 """
 
 import argparse
+import functools
 import io
 import json
 import logging
 import os
 import sys
 from pathlib import Path
-from typing import Dict, Any, Tuple, List
-
-import yaml
+from typing import Dict, Any, Tuple, List, BinaryIO, Callable
 
 try:
-    from poslib import api as pos
-    from poslib import restapi
+    import orjson
 except ImportError:
-    print(
-        "Could not import poslib. Activate your environment.",
-        file=sys.stderr,
-    )
-    sys.exit(1)
+    orjson = None
+
+# poslib and yaml are imported on first use so that --help and argument
+# errors do not pay for them.
+pos: Any = None  # pylint: disable=invalid-name
+restapi: Any = None  # pylint: disable=invalid-name
+yaml: Any = None  # pylint: disable=invalid-name
+_yaml_loader: Any = None  # pylint: disable=invalid-name
+
+
+def _import_poslib() -> bool:
+    """Import poslib into the module globals; False if unavailable."""
+    global pos, restapi  # pylint: disable=global-statement
+    if pos is not None:
+        return True
+    try:
+        # pylint: disable=import-outside-toplevel
+        from poslib import api as pos_api
+        from poslib import restapi as pos_restapi
+    except ImportError:
+        print(
+            "Could not import poslib. Activate your environment.",
+            file=sys.stderr,
+        )
+        return False
+    pos, restapi = pos_api, pos_restapi
+    return True
+
+
+def _import_yaml() -> None:
+    """Import PyYAML and its fastest safe loader into the module globals."""
+    global yaml, _yaml_loader  # pylint: disable=global-statement
+    if yaml is not None:
+        return
+    import yaml as yaml_mod  # pylint: disable=import-outside-toplevel
+    # libyaml-backed loader when available; pure-Python fallback otherwise
+    yaml = yaml_mod
+    _yaml_loader = getattr(yaml_mod, "CSafeLoader", yaml_mod.SafeLoader)
 
 
 # ----------------------------- logging ------------------------------------ #
 
+# Libraries whose INFO/DEBUG chatter is muted
+_NOISY: Tuple[str, ...] = ("urllib3", "httpx", "requests")
+
+_LOGGING_CONFIGURED: bool = False
+
+
 def setup_logging(verbose: bool) -> logging.Logger:
-    """Configure logger."""
+    """Configure logger (only the first call has an effect)."""
+    global _LOGGING_CONFIGURED  # pylint: disable=global-statement
+    if _LOGGING_CONFIGURED:
+        return logging.getLogger("pos-exp")
+    _LOGGING_CONFIGURED = True
+
     level = logging.DEBUG if verbose else logging.INFO
     logging.basicConfig(
         level=level,
@@ -36,51 +78,162 @@ def setup_logging(verbose: bool) -> logging.Logger:
         datefmt="%Y-%m-%d %H:%M:%S",
     )
     # Mute libraries
-    logging.getLogger("urllib3").setLevel(logging.WARNING)
-    logging.getLogger("httpx").setLevel(logging.WARNING)
-    logging.getLogger("requests").setLevel(logging.WARNING)
+    for name in _NOISY:
+        logging.getLogger(name).setLevel(logging.WARNING)
     return logging.getLogger("pos-exp")
 
 
 # ----------------------------- helpers ------------------------------------ #
 
-def sum_processor_counts(node_info: Dict[str, Any], key: str) -> int:
-    """Sum cores/threads across sockets for legacy structures."""
-    total = 0
-    for pinfo in node_info.get("processor", []) or []:
-        val = pinfo.get(key)
-        if val is None and key == "threads":
-            val = pinfo.get("cores", 0)
-        total += int(val or 0)
-    return total
+def sum_cpu_counts(node_info: Dict[str, Any]) -> Tuple[int, int]:
+    """Sum (cores, threads) across sockets in a single pass.
+
+    Sockets without a thread count (legacy structures) contribute their
+    core count to the thread total.
+    """
+    cores = threads = 0
+    for pinfo in node_info.get("processor") or ():
+        cores += int(pinfo.get("cores") or 0)
+        t = pinfo.get("threads")
+        threads += int(t if t is not None else pinfo.get("cores") or 0)
+    return cores, threads
+
+
+@functools.lru_cache(maxsize=8)
+def _show_node(node: str) -> Dict[str, Any]:
+    """Return pos.nodes.show data for node, fetched once per run."""
+    data, _ = pos.nodes.show(node)
+    return data
 
 
 def get_cpu_counts(node: str, log: logging.Logger) -> Tuple[int, int]:
     """Get total cores and threads for node (from pos.nodes.show)."""
-    data, _ = pos.nodes.show(node)
+    data = _show_node(node)
     info = data.get(node, {})
-    cores = sum_processor_counts(info, "cores")
-    threads = sum_processor_counts(info, "threads")
+    cores, threads = sum_cpu_counts(info)
     log.debug("Detected CPU topology: cores=%d threads=%d", cores, threads)
     return cores, threads
 
 
-def make_series(n: int) -> List[int]:
-    """Return [1..n]."""
+def make_series(n: int) -> range:
+    """Return 1..n as a lazy range (expanded only when encoded)."""
     n = max(1, int(n or 1))
-    return list(range(1, n + 1))
+    return range(1, n + 1)
+
+
+def _encode_cores_json(n: int) -> bytes:
+    """Return the loop-variable payload {"cores": [1..n]} as JSON bytes."""
+    series = ",".join(map(str, make_series(n))).encode("ascii")
+    return b'{"cores":[' + series + b"]}"
+
+
+def _load_yaml_bytes(path: str) -> Dict[str, Any]:
+    """Parse a YAML file, via its sibling .cache.json when that matches.
+
+    The cache records the YAML's (mtime_ns, size) and is only used when
+    both match exactly, so copies carrying an older mtime are re-parsed.
+    """
+    cache = path + ".cache.json"
+    st = os.stat(path)
+    source = [st.st_mtime_ns, st.st_size]
+    try:
+        cached = _load_json_bytes(cache)
+        if cached.get("source") == source:
+            return cached["data"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    _import_yaml()
+    with open(path, "rb") as f:
+        data = yaml.load(f, Loader=_yaml_loader) or {}
+
+    # Best effort: the directory may be read-only or the YAML may hold
+    # values JSON cannot represent; the parsed data is valid either way.
+    tmp = cache + ".tmp"
+    try:
+        encoded = _dumps_bytes({"source": source, "data": data})
+        with open(tmp, "wb") as f:
+            f.write(encoded)
+        os.replace(tmp, cache)
+    except (OSError, TypeError, ValueError):
+        pass
+    return data
 
 
-def _load_vars_from_path(path: str) -> Dict[str, Any]:
-    """Load YAML/JSON file into dict."""
-    ext = os.path.splitext(path)[1].lower()
-    if ext in {".yaml", ".yml"}:
-        with open(path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f) or {}
-    with open(path, "r", encoding="utf-8") as f:
+def _load_json_bytes(path: str) -> Dict[str, Any]:
+    """Parse a JSON file read in binary mode."""
+    with open(path, "rb") as f:
+        if orjson:
+            return orjson.loads(f.read())  # pylint: disable=no-member
         return json.load(f)
 
 
+def _yaml_payload(path: str) -> bytes:
+    """Return a YAML variables file encoded as JSON."""
+    return _dumps_bytes(_load_yaml_bytes(path))
+
+
+def _json_payload(path: str) -> bytes:
+    """Return a JSON variables file as-is; it is already in wire format."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+# JSON payload builders by extension; anything else is sent as JSON
+_LOADERS: Dict[str, Callable[[str], bytes]] = {
+    ".yaml": _yaml_payload,
+    ".yml": _yaml_payload,
+    ".json": _json_payload,
+}
+
+# User paths are expanded at most once each
+_expand: Callable[[str], str] = functools.cache(os.path.expanduser)
+
+# JSON payloads of variable files keyed by (abspath, mtime_ns, size)
+_VARS_CACHE: Dict[Tuple[str, int, int], bytes] = {}
+
+
+def _load_vars_from_path(path: str) -> bytes:
+    """Return a YAML/JSON file as a JSON payload (cached until it changes)."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    cached = _VARS_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    suffix = Path(path).suffix.lower()
+    loader = _LOADERS.get(suffix, _json_payload)
+    payload = _VARS_CACHE[key] = loader(path)
+    return payload
+
+
+def _dumps_bytes_stdlib(data: Any) -> bytes:
+    """Serialize data to compact UTF-8 JSON with the stdlib encoder."""
+    return json.dumps(
+        data,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+
+def _dumps_bytes_orjson(data: Any) -> bytes:
+    """Serialize data to compact UTF-8 JSON with orjson.
+
+    Values orjson cannot encode (e.g. integers beyond 64 bits) fall back
+    to the stdlib encoder.
+    """
+    try:
+        # pylint: disable-next=no-member
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:  # pylint: disable=no-member
+        return _dumps_bytes_stdlib(data)
+
+
+_dumps_bytes: Callable[[Any], bytes] = (
+    _dumps_bytes_orjson if orjson else _dumps_bytes_stdlib
+)
+
+
 def set_variables_from_path(
     node: str,
     path: str,
@@ -89,8 +242,7 @@ def set_variables_from_path(
     log: logging.Logger,
 ) -> None:
     """Send variables file to pos."""
-    data = _load_vars_from_path(path)
-    buf = io.BytesIO(json.dumps(data).encode("utf-8"))
+    buf = io.BytesIO(_load_vars_from_path(path))
     pos.allocations.set_variables(
         node,
         buf,
@@ -99,21 +251,22 @@ def set_variables_from_path(
         as_loop=as_loop,
         print_variables=False,
     )
-    log.debug(
-        "Set variables from %s (global=%s loop=%s)",
-        path,
-        as_global,
-        as_loop,
-    )
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(
+            "Set variables from %s (global=%s loop=%s)",
+            path,
+            as_global,
+            as_loop,
+        )
 
 
 def set_inline_loop_variables(
     node: str,
-    loop_vars: Dict[str, Any],
+    loop_vars: bytes,
     log: logging.Logger,
 ) -> None:
-    """Send inline loop variables to pos."""
-    buf = io.BytesIO(json.dumps(loop_vars).encode("utf-8"))
+    """Send pre-encoded JSON loop variables to pos."""
+    buf = io.BytesIO(loop_vars)
     pos.allocations.set_variables(
         node,
         buf,
@@ -122,7 +275,41 @@ def set_inline_loop_variables(
         as_loop=True,
         print_variables=False,
     )
-    log.debug("Loop Vars: %s", loop_vars)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Loop Vars: %s", loop_vars.decode("utf-8"))
+
+
+# Scripts up to this size are kept in memory between launches
+_SCRIPT_CACHE_MAX: int = 1024 * 1024
+
+# Script contents keyed by (abspath, mtime_ns)
+_SCRIPT_CACHE: Dict[Tuple[str, int], bytes] = {}
+
+
+# Script stat results keyed by abspath, taken once during preflight
+_SCRIPT_STATS: Dict[str, os.stat_result] = {}
+
+
+def _stat_script(script_path: str) -> os.stat_result:
+    """Stat script once; raises FileNotFoundError if it is missing."""
+    key = os.path.abspath(script_path)
+    st = _SCRIPT_STATS.get(key)
+    if st is None:
+        st = _SCRIPT_STATS[key] = os.stat(script_path)
+    return st
+
+
+def _open_script(script_path: str) -> BinaryIO:
+    """Open script in binary mode; small scripts are served from memory."""
+    st = _stat_script(script_path)
+    if st.st_size > _SCRIPT_CACHE_MAX:
+        # pylint: disable-next=consider-using-with
+        return open(script_path, "rb")
+    key = (os.path.abspath(script_path), st.st_mtime_ns)
+    data = _SCRIPT_CACHE.get(key)
+    if data is None:
+        data = _SCRIPT_CACHE[key] = Path(script_path).read_bytes()
+    return io.BytesIO(data)
 
 
 def run_infile(
@@ -136,7 +323,7 @@ def run_infile(
 ) -> Any:
     """Run a script on node via infile."""
     log.info("Run %s", name)
-    with open(script_path, "r", encoding="utf-8") as f:
+    with _open_script(script_path) as f:
         _, data = pos.commands.launch(
             node=node,
             infile=f,
@@ -149,8 +336,8 @@ def run_infile(
 
 # ------------------------------- main ------------------------------------- #
 
-def main() -> int:
-    """Main entry."""
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser."""
     parser = argparse.ArgumentParser()
     parser.add_argument("node", help="Load generator node")
     parser.add_argument("--experiment-name", default="stress-energy")
@@ -172,27 +359,78 @@ def main() -> int:
         help="Request daemon to publish this run",
     )
     parser.add_argument("--verbose", "-v", action="store_true")
-    args = parser.parse_args()
+    return parser
+
+
+_PARSER: argparse.ArgumentParser = _build_parser()
+
+
+def main() -> int:
+    """Main entry."""
+    args = _PARSER.parse_args()
+
+    if not _import_poslib():
+        return 1
 
     log = setup_logging(args.verbose)
-    log.debug("Executing as user: %s", os.path.expanduser('~'))
+    log.debug("Executing as user: %s", _expand('~'))
     log.debug("Executing as user: %s", os.getlogin())
     log.debug("Executing as user: %s", os.environ.get("USERNAME"))
     log.info("Starting %s on node %s", args.experiment_name, args.node)
 
     # Preflight checks
-    global_vars_path = Path(os.path.expanduser(args.global_vars))
+    global_vars_path = Path(_expand(args.global_vars))
     if not global_vars_path.exists():
         log.error("Global vars file not found: %s", global_vars_path)
         return 2
+    if global_vars_path.suffix.lower() in {".yaml", ".yml"}:
+        try:
+            _import_yaml()
+        except ImportError as e:
+            log.error("Cannot read %s: %s", global_vars_path, e)
+            return 2
 
     setup_script_p = Path("loadgen") / "setup.sh"
     exp_script_p = Path("loadgen") / "measurement.sh"
     for pth in (setup_script_p, exp_script_p):
-        if not pth.exists():
+        try:
+            _stat_script(str(pth))
+        except OSError:
             log.error("Script not found: %s", pth)
             return 2
 
+    # Resolve the Zenodo token before allocating so a missing token does
+    # not surface only after the whole experiment has run.
+    token = None
+    if args.publish:
+        if args.zenodo_token_file:
+            token_file = _expand(args.zenodo_token_file)
+            log.debug("Zenodo token file: %s", token_file)
+            try:
+                token = Path(token_file).read_text(encoding="utf-8").strip()
+                log.debug("Using Zenodo token file: %s", token_file)
+            except FileNotFoundError:
+                token = None
+            except OSError as e:
+                log.error(
+                    "Failed reading token file: %s",
+                    e,
+                    exc_info=args.verbose,
+                )
+
+        if not token:
+            env_tok = os.environ.get("ZENODO_ACCESS_TOKEN", "").strip()
+            if env_tok:
+                log.debug("Using ZENODO_ACCESS_TOKEN from env")
+                token = env_tok
+
+        if not token:
+            log.error(
+                "No Zenodo token. Provide --zenodo-token-file or set "
+                "ZENODO_ACCESS_TOKEN."
+            )
+            return 2
+
     log.info("Free allocation")
     try:
         pos.allocations.free(args.node)
@@ -219,7 +457,7 @@ def main() -> int:
     use = threads if args.enable_hyperthreading and threads else cores
     if args.enable_hyperthreading and not threads:
         log.warning("HT requested but no thread count; using cores.")
-    loop_vars = {"cores": make_series(use)}
+    loop_vars = _encode_cores_json(use)
 
     log.info("Set global variables: %s", global_vars_path)
     try:
@@ -257,12 +495,7 @@ def main() -> int:
         return 1
 
     # Boot params (deduplicate preserving order)
-    seen = set()
-    bootparams: List[str] = []
-    for bp in args.bootparam:
-        if bp not in seen:
-            bootparams.append(bp)
-            seen.add(bp)
+    bootparams: List[str] = list(dict.fromkeys(args.bootparam))
 
     log.debug("Apply boot params: %s", bootparams)
     try:
@@ -335,30 +568,20 @@ def main() -> int:
         ]
         keywords = ",".join(keywords)
 
-        pos.results.modify_metadata(
-            result_folder=result_folder,
-            allocation_id=None,
-            action="add_title",
-            data={"title": title},
-        )
-        pos.results.modify_metadata(
-            result_folder=result_folder,
-            allocation_id=None,
-            action="add_description",
-            data={"description": desc},
-        )
-        pos.results.modify_metadata(
-            result_folder=result_folder,
-            allocation_id=None,
-            action="add_keywords",
-            data={"keywords": keywords},
-        )
-        pos.results.modify_metadata(
-            result_folder=result_folder,
-            allocation_id=None,
-            action="add_license",
-            data={"license": "CC-BY-4.0"},
-        )
+        updates = [
+            ("add_title", {"title": title}),
+            ("add_description", {"description": desc}),
+            ("add_keywords", {"keywords": keywords}),
+            ("add_license", {"license": "CC-BY-4.0"}),
+        ]
+        # Sequential on purpose: every action edits the same RO-Crate file
+        for action, data in updates:
+            pos.results.modify_metadata(
+                result_folder=result_folder,
+                allocation_id=None,
+                action=action,
+                data=data,
+            )
         log.debug(
             "Metadata updated: title, description, keywords, license."
         )
@@ -383,54 +606,25 @@ def main() -> int:
         rf_path = os.path.join("/srv/testbed/results", str(result_folder))
         log.info("Publishing results to Zenodo")
 
-        token = None
-        if args.zenodo_token_file:
-            token_file = os.path.expanduser(args.zenodo_token_file)
-            if token_file:
-                log.debug("Zenodo token file: %s", token_file)
-            try:
-                if os.path.exists(token_file):
-                    log.debug("Using Zenodo token file: %s", token_file)
-                    with open(token_file, "r", encoding="utf-8") as f:
-                        token = f.read().strip()
-            except OSError as e:
-                log.error(
-                    "Failed reading token file: %s",
-                    e,
-                    exc_info=args.verbose,
-                )
-
-        if not token:
-            env_tok = os.environ.get("ZENODO_ACCESS_TOKEN", "").strip()
-            if env_tok:
-                log.debug("Using ZENODO_ACCESS_TOKEN from env")
-                token = env_tok
-
-        if not token:
+        try:
+            deposition_link = pos.results.upload(
+                result_folder=rf_path,
+                allocation_id=alloc_id,
+                access_token=token,
+                publish=True,
+                deposition_id=None,
+                title=None,
+                description=None,
+                license="CC-BY-4.0",
+                access_right="open",
+            )
+            log.info("Published to Zenodo: %s", deposition_link)
+        except restapi.RESTError as e:
             log.error(
-                "No Zenodo token. Provide --zenodo-token-file or set "
-                "ZENODO_ACCESS_TOKEN. Skipping publish."
+                "Publication failed: %s",
+                e,
+                exc_info=args.verbose,
             )
-        else:
-            try:
-                deposition_link = pos.results.upload(
-                    result_folder=rf_path,
-                    allocation_id=alloc_id,
-                    access_token=token,
-                    publish=True,
-                    deposition_id=None,
-                    title=None,
-                    description=None,
-                    license="CC-BY-4.0",
-                    access_right="open",
-                )
-                log.info("Published to Zenodo: %s", deposition_link)
-            except restapi.RESTError as e:
-                log.error(
-                    "Publication failed: %s",
-                    e,
-                    exc_info=args.verbose,
-                )
 
     log.info("Results at: %s", result_folder)
 
@@ -3,13 +3,23 @@
 Build docs/leaderboard.json from submission/<user>/<run_id> (manifest-only).
 """
 
+import functools
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any
+from urllib.parse import quote
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 OWNER = os.environ.get("GITHUB_REPOSITORY", "").split("/")[0]
@@ -23,48 +33,80 @@ if GH_TOKEN:
     HEAD["Authorization"] = f"Bearer {GH_TOKEN}"
 HEAD["X-GitHub-Api-Version"] = "2022-11-28"
 
+MAX_WORKERS = 16
+
+# manifest.json contents by git blob sha; blobs are immutable, so entries
+# never go stale and only new or changed manifests are downloaded
+CACHE_DIR = Path("docs/.leaderboard-cache")
+
+# One pooled session so API and raw downloads reuse TCP/TLS connections
+SESSION = requests.Session()
+SESSION.headers.update(HEAD)
+_ADAPTER = HTTPAdapter(
+    pool_connections=MAX_WORKERS,
+    pool_maxsize=MAX_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=0.3,
+                      status_forcelist=[502, 503, 504]),
+)
+SESSION.mount("http://", _ADAPTER)
+SESSION.mount("https://", _ADAPTER)
 
-def gh_contents(path: str) -> Any:
-    """Get the contents of a GitHub repository directory."""
-    url = f"{API}/repos/{OWNER}/{REPO}/contents/{path}"
-    params = {"ref": BRANCH}
-    r = requests.get(url, headers=HEAD, params=params, timeout=30)
+
+@functools.lru_cache(maxsize=1)
+def gh_tree() -> Dict[str, Dict[str, str]]:
+    """Get the whole branch tree in one call, keyed by path."""
+    url = f"{API}/repos/{OWNER}/{REPO}/git/trees/{BRANCH}"
+    params = {"recursive": "1"}
+    r = SESSION.get(url, params=params, timeout=30)
     if r.status_code == 404:
-        return []
+        return {}
     r.raise_for_status()
-    return r.json()
+    js = r.json()
+    if js.get("truncated"):
+        # A partial tree would silently drop runs from the leaderboard
+        print("::error::git tree listing truncated by GitHub; "
+              "refusing to write a partial leaderboard", file=sys.stderr)
+        raise SystemExit(1)
+    return {
+        ent["path"]: {"type": ent.get("type", ""), "sha": ent.get("sha", "")}
+        for ent in js.get("tree", [])
+    }
+
 
+def files_by_dir(tree: Dict[str, Dict[str, str]]) -> Dict[str, List[str]]:
+    """Group the file paths of a tree by their parent directory."""
+    dirs: Dict[str, List[str]] = {}
+    for path, ent in tree.items():
+        if ent["type"] == "blob":
+            dirs.setdefault(path.rpartition("/")[0], []).append(path)
+    return dirs
 
-def list_runs(root: str = "submission") -> List[Dict[str, str]]:
-    """List all runs in the specified root directory."""
+
+def list_runs(tree: Dict[str, Dict[str, str]],
+              root: str = "submission") -> List[Dict[str, str]]:
+    """List all runs (root/<user>/<run_id> dirs) in the tree."""
     runs: List[Dict[str, str]] = []
-    for user in gh_contents(root):
-        if user.get("type") != "dir":
+    for path, ent in tree.items():
+        if ent["type"] != "tree":
             continue
-        user_path = f"{root}/{user['name']}"
-        for run in gh_contents(user_path):
-            if run.get("type") == "dir":
-                runs.append({
-                    "user": user["name"],
-                    "path": f"{user_path}/{run['name']}",
-                })
+        parts = path.split("/")
+        if len(parts) == 3 and parts[0] == root:
+            runs.append({"user": parts[1], "path": path})
     return runs
 
 
-def download_url_for(path: str) -> Optional[str]:
-    """Get the download URL for a file in the repository."""
-    js = gh_contents(path)
-    if isinstance(js, dict) and "download_url" in js:
-        return js["download_url"]
-    return None
+@functools.lru_cache(maxsize=1024)
+def download_url_for(path: str) -> str:
+    """Get the raw download URL for a file in the repository."""
+    return (f"https://raw.githubusercontent.com/{OWNER}/{REPO}/{BRANCH}/"
+            f"{quote(path)}")
 
 
-def read_manifest(path: str) -> Dict[str, Any]:
-    """Read the manifest.json file."""
-    url = download_url_for(path)
-    if not url:
-        return {}
-    r = requests.get(url, timeout=30)
+def read_manifest(sha: str) -> Dict[str, Any]:
+    """Read a manifest.json by its git blob sha."""
+    url = f"{API}/repos/{OWNER}/{REPO}/git/blobs/{sha}"
+    headers = {"Accept": "application/vnd.github.raw"}
+    r = SESSION.get(url, headers=headers, timeout=30)
     r.raise_for_status()
     try:
         return r.json()
@@ -72,8 +114,39 @@ def read_manifest(path: str) -> Dict[str, Any]:
         return {}
 
 
+def read_manifest_cached(sha: str) -> Dict[str, Any]:
+    """Read manifest.json, reusing the on-disk copy of its blob if any."""
+    cache_file = CACHE_DIR / f"{sha}.json"
+    if cache_file.exists():
+        try:
+            return json.loads(cache_file.read_text(encoding="utf-8"))
+        except ValueError:
+            pass
+    manifest = read_manifest(sha)
+    if manifest:
+        # Best effort: a cache failure must not abort the build
+        tmp = cache_file.with_suffix(".tmp")
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(manifest), encoding="utf-8")
+            os.replace(tmp, cache_file)
+        except OSError as exc:
+            print(f"warning: could not cache {sha}: {exc}", file=sys.stderr)
+    return manifest
+
+
+def _first_int(d: Dict[str, Any], *keys: str) -> int:
+    """Return the first truthy value among keys as int, else 0."""
+    for key in keys:
+        val = d.get(key)
+        if val:
+            return int(val)
+    return 0
+
+
 def summarize(manifest: Dict[str, Any],
-              run: Dict[str, str]) -> Dict[str, Any]:
+              run: Dict[str, str],
+              files: Dict[str, List[str]]) -> Dict[str, Any]:
     """Summarize the run information."""
     author = manifest.get("author") or {}
     user = manifest.get("username") or run["user"]
@@ -89,17 +162,19 @@ def summarize(manifest: Dict[str, Any],
     sockets = 0
     sockets_list = []
     if isinstance(procs, list) and procs:
-        first = procs[0] or {}
-        label = " ".join([first.get("vendor", ""),
-                          first.get("model", "")]).strip() or "unknown"
-        for p in procs:
-            total_cores += int(p.get("cores") or 0)
-            total_threads += int(p.get("threads") or 0)
+        for i, p in enumerate(procs):
+            if i == 0:
+                label = " ".join([p.get("vendor", ""),
+                                  p.get("model", "")]).strip() or "unknown"
+            cores = _first_int(p, "cores")
+            threads = _first_int(p, "threads")
+            total_cores += cores
+            total_threads += threads
             sockets_list.append({
                 "vendor": p.get("vendor") or "",
                 "model": p.get("model") or "",
-                "cores": int(p.get("cores") or 0),
-                "threads": int(p.get("threads") or 0),
+                "cores": cores,
+                "threads": threads,
                 })
         sockets = len(procs)
 
@@ -116,14 +191,17 @@ def summarize(manifest: Dict[str, Any],
         "current-over-time.png",
         "smoothed-voltage.png",
     ]
-    images: List[str] = []
-    energy_dir = f"{run['path']}/energy"
-    by_lower: Dict[str, str] = {}
-    for ent in gh_contents(energy_dir):
-        if ent.get("type") == "file" and ent["name"].lower().endswith(".png"):
-            by_lower[ent["name"].lower()] = ent.get("download_url")
-    for name in want:
-        images.append(by_lower.get(name, ""))
+    energy_files = files.get(f"{run['path']}/energy")
+    if energy_files:
+        by_lower: Dict[str, str] = {}
+        for path in energy_files:
+            name = path.rpartition("/")[2].lower()
+            if name.endswith(".png"):
+                by_lower[name] = download_url_for(path)
+        images = [by_lower.get(name, "") for name in want]
+    else:
+        # No energy folder in the tree: nothing to look up
+        images = [""] * len(want)
 
     # run details
     rd_src = manifest.get("run_details") or {}
@@ -164,19 +242,33 @@ def summarize(manifest: Dict[str, Any],
     }
 
 
+def dump_json(obj: Any) -> bytes:
+    """Serialize obj as UTF-8 JSON indented by two spaces."""
+    if orjson:
+        # pylint: disable-next=no-member
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
 def main() -> int:
     """Main entry point."""
-    runs = list_runs()
+    tree = gh_tree()
+    files = files_by_dir(tree)
+    runs = [r for r in list_runs(tree)
+            if f"{r['path']}/manifest.json" in tree]
+    shas = [tree[f"{r['path']}/manifest.json"]["sha"] for r in runs]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        manifests = list(pool.map(read_manifest_cached, shas))
+
     out = {"runs": []}
-    for r in runs:
-        manifest = read_manifest(f"{r['path']}/manifest.json")
+    for r, manifest in zip(runs, manifests):
         if not manifest:
             continue
-        out["runs"].append(summarize(manifest, r))
+        out["runs"].append(summarize(manifest, r, files))
 
     out_path = Path("docs/leaderboard.json")
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(json.dumps(out, indent=2), encoding="utf-8")
+    out_path.write_bytes(dump_json(out))
     print(f"Wrote {out_path} with {len(out['runs'])} runs.")
     return 0
 
@@ -12,13 +12,17 @@ import json
 import re
 import sys
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Tuple
 
 from jsonschema import Draft7Validator
 from PIL import Image
 
 
 MAX_PNG_MB = 5
+READ_BUFFER = 64 * 1024
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+PNG_IHDR = b"\x00\x00\x00\x0dIHDR"
+PNG_IEND = b"\x00\x00\x00\x00IEND"
 RE_USER = re.compile(r"^[a-z0-9._-]{1,40}$")
 RE_RUN = re.compile(r"^[a-zA-Z0-9._:-]{1,80}$")
 
@@ -43,6 +47,8 @@ MANIFEST_SCHEMA: Dict = {
     "additionalProperties": True,
 }
 
+_VALIDATOR = Draft7Validator(MANIFEST_SCHEMA)
+
 
 def fail(msg: str) -> None:
     """Print error message and exit."""
@@ -50,13 +56,41 @@ def fail(msg: str) -> None:
     raise SystemExit(1)
 
 
+def _read_json(path: Path) -> Any:
+    """Parse a JSON file through a 64 KiB binary buffer."""
+    with path.open("rb", buffering=READ_BUFFER) as f:
+        return json.load(f)
+
+
+def _png_is_well_formed(path: Path) -> bool:
+    """Cheap structural PNG check: signature, sane IHDR, trailing IEND."""
+    with path.open("rb") as f:
+        head = f.read(24)
+        if len(head) < 24:
+            return False
+        f.seek(-12, 2)
+        tail = f.read(12)
+    if head[:8] != PNG_MAGIC or head[8:16] != PNG_IHDR:
+        return False
+    width = int.from_bytes(head[16:20], "big")
+    height = int.from_bytes(head[20:24], "big")
+    return width > 0 and height > 0 and tail[:8] == PNG_IEND
+
+
 def validate_png(path: Path) -> None:
-    """Validate PNG file exists, is <= MAX_PNG_MB, and is a valid image."""
+    """Validate PNG file exists, is <= MAX_PNG_MB, and is a valid image.
+
+    Files with a PNG signature, a non-empty IHDR and a trailing IEND
+    chunk are accepted without decoding; Pillow verifies everything else.
+    """
     if not path.exists():
         fail(f"Missing PNG: {path}")
     size_mb = path.stat().st_size / (1024 * 1024)
     if size_mb > MAX_PNG_MB:
         fail(f"PNG too large (> {MAX_PNG_MB} MB): {path}")
+    if _png_is_well_formed(path):
+        return
+    # Anything else gets Pillow's full verification for a useful error
     try:
         with Image.open(path) as im:
             im.verify()
@@ -71,12 +105,11 @@ def validate_manifest(path: Path) -> Dict:
     if not path.exists():
         fail(f"Missing manifest.json at {path}")
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
+        data = _read_json(path)
     except Exception as exc:  # pylint: disable=broad-exception-caught
         fail(f"manifest.json not valid JSON: {exc}")
 
-    errs = sorted(Draft7Validator(MANIFEST_SCHEMA).iter_errors(data),
-                  key=str)
+    errs = sorted(_VALIDATOR.iter_errors(data), key=str)
     if errs:
         for e in errs:
             print(f"::error::manifest schema: {e.message}")
@@ -141,7 +174,7 @@ def main() -> int:
                 if hw.exists():
                     # parse once to ensure valid JSON
                     try:
-                        json.loads(hw.read_text(encoding="utf-8"))
+                        _read_json(hw)
                     # pylint: disable=broad-exception-caught
                     except Exception as exc:
                         fail(f"hardware.json invalid JSON: {exc}")